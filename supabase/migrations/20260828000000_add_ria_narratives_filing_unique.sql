@@ -0,0 +1,20 @@
+-- Add unique constraint on (filing_fk, narrative_type) for ria_narratives
+-- This lets the ETL loaders upsert with ON CONFLICT instead of fetching every
+-- existing filing_fk and deduplicating client-side before each insert.
+
+-- First, ensure no duplicates exist (cleanup if needed)
+DELETE FROM ria_narratives
+WHERE narrative_pk NOT IN (
+  SELECT DISTINCT ON (filing_fk, narrative_type) narrative_pk
+  FROM ria_narratives
+  ORDER BY filing_fk, narrative_type, created_at DESC
+);
+
+-- Add unique constraint on (filing_fk, narrative_type)
+ALTER TABLE ria_narratives
+ADD CONSTRAINT ria_narratives_filing_fk_narrative_type_unique
+UNIQUE (filing_fk, narrative_type);
+
+-- Add comment to document the constraint
+COMMENT ON CONSTRAINT ria_narratives_filing_fk_narrative_type_unique ON ria_narratives IS
+'Unique constraint on (filing_fk, narrative_type) so loaders can upsert with ignore_duplicates instead of pre-fetching existing filing_fks';
@@ -0,0 +1,9 @@
+-- Add content-hash columns so the ETL loaders can skip unchanged rows.
+-- The loaders bulk-compute a hash per source row (pandas hash_pandas_object,
+-- int64) and only upsert rows whose hash differs from what is stored here.
+
+ALTER TABLE advisers ADD COLUMN IF NOT EXISTS row_hash BIGINT;
+ALTER TABLE filings ADD COLUMN IF NOT EXISTS row_hash BIGINT;
+
+COMMENT ON COLUMN advisers.row_hash IS 'Content hash of the source row; used by loaders to skip unchanged records';
+COMMENT ON COLUMN filings.row_hash IS 'Content hash of the source row; used by loaders to skip unchanged records';
@@ -0,0 +1,21 @@
+-- Single-round-trip table counts for connection smoke tests.
+-- Returns planner-maintained live-tuple estimates from pg_stat_user_tables,
+-- so one RPC replaces one count query per table and never seq-scans.
+
+CREATE OR REPLACE FUNCTION pg_table_counts(names text[])
+RETURNS TABLE(relname name, n_live_tup bigint)
+LANGUAGE sql
+STABLE
+SECURITY DEFINER
+SET search_path = public, pg_catalog
+AS $$
+    SELECT s.relname, s.n_live_tup
+    FROM pg_stat_user_tables s
+    WHERE s.relname = ANY(names)
+    ORDER BY s.relname;
+$$;
+
+GRANT EXECUTE ON FUNCTION pg_table_counts(text[]) TO service_role;
+
+COMMENT ON FUNCTION pg_table_counts(text[]) IS
+'Approximate row counts for the named tables in one query (smoke tests).';